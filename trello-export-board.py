@@ -9,6 +9,7 @@ Requirements:
 - python-dateutil (https://pypi.org/project/python-dateutil/)
 - requests (https://pypi.org/project/requests/)
 - XlsxWriter (https://pypi.org/project/XlsxWriter/)
+- orjson (optional, https://pypi.org/project/orjson/)
 - xhtml2pdf (https://xhtml2pdf.readthedocs.io/en/latest/)
 - markdown (https://python-markdown.github.io/index.html)
 
@@ -25,54 +26,66 @@ Usage:
 """
 
 import configparser
+import functools
 import jinja2
-import json
 import markdown
+import multiprocessing
 import os
 import re
 import requests
 import shutil
 import sys
+import threading
 import unicodedata
 import xlsxwriter
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dateutil.parser import parse
 from dateutil import tz
 from datetime import datetime
+from docx.opc import phys_pkg as docx_phys_pkg
 from docxtpl import DocxTemplate
-from io import BytesIO
 from os.path import exists as path_exists
 from os import remove
 from xhtml2pdf import pisa
 
+# Optional: faster JSON parser, json is used as fallback
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# get_config_from_ini() cache
+_CONFIG_CACHE = {}
+_CONFIG_LOCK = threading.Lock()
+# sanitize_filename() patterns
+_RE_STRIP = re.compile(r'[^\.\w\s-]')
+_RE_SEP = re.compile(r'[-_\s]+')
+_RE_DOT = re.compile(r'[\.]+')
+# escape_xml() translation table
+_XML_ESCAPE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
 
 def get_config_from_ini():
     """
-    Read configuration file (config.ini)
+    Read configuration file (config.ini), cached until the file changes
     :return: configparser.ConfigParser
     """
-    if not os.path.exists('config.ini'):
-        shutil.copyfile('config-sample.ini', 'config.ini')
-        #print("error : config.ini missing\n")
-        #sys.exit()
-    config = configparser.ConfigParser()
-    config.read('config.ini', encoding='utf-8')
-    return config
-
-def lists_get_name(listId, haystack):
-    """
-    Search for a given list name in list (haystack)
-    :param listId: String list id (Pattern: ^[0-9a-fA-F]$)
-    :param haystack: 2D Array lists (lists[[id],[name],[pos]])
-        haystack[i][0] : 'id'
-        haystack[i][1] : 'name'
-        haystack[i][2] : 'pos'
-    :return: String list name or empty string
-    """
-    for row in haystack:
-        if row[0] == listId:
-            return str(row[1])
-    return ''
+    with _CONFIG_LOCK:
+        if not os.path.exists('config.ini'):
+            shutil.copyfile('config-sample.ini', 'config.ini')
+            #print("error : config.ini missing\n")
+            #sys.exit()
+        # Parse config.ini only if it changed since last call
+        st = os.stat('config.ini')
+        key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if _CONFIG_CACHE.get('key') == key:
+            return _CONFIG_CACHE['config']
+        config = configparser.ConfigParser()
+        config.read('config.ini', encoding='utf-8')
+        _CONFIG_CACHE['key'] = key
+        _CONFIG_CACHE['config'] = config
+        return config
 
 def sanitize_filename(filename):
     """
@@ -81,9 +94,9 @@ def sanitize_filename(filename):
     :return: String filename
     """
     filename = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('utf8')
-    filename = re.sub(r'[^\.\w\s-]', '', filename)
-    filename = re.sub(r'[-_\s]+', '-', filename)
-    filename = re.sub(r'[\.]+', '.', filename)
+    filename = _RE_STRIP.sub('', filename)
+    filename = _RE_SEP.sub('-', filename)
+    filename = _RE_DOT.sub('.', filename)
     filename = filename.strip('-_.')
     return filename
 
@@ -93,7 +106,7 @@ def escape_xml(str_input):
     :param str_input: String
     :return: String
     """
-    return str_input.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return str_input.translate(_XML_ESCAPE)
 
 def convert_UTC_to_Local_Datetime(strDate):
     """
@@ -101,14 +114,98 @@ def convert_UTC_to_Local_Datetime(strDate):
     :param strDate: String date
     :return: datetime
     """
-    from_zone = tz.gettz(config['Dates']['tz_from_zone'])
-    to_zone = tz.gettz(config['Dates']['tz_to_zone'])
-    utc = parse(strDate)
-    utc = utc.replace(tzinfo=from_zone)
-    local = utc.astimezone(to_zone)
+    # Trello dates are ISO 8601 (e.g. '2023-01-31T12:00:00.000Z')
+    try:
+        utc = datetime.fromisoformat(strDate.replace('Z', '+00:00'))
+    except ValueError:
+        utc = parse(strDate)
+    utc = utc.replace(tzinfo=_FROM_ZONE)
+    local = utc.astimezone(_TO_ZONE)
     #return local.replace(tzinfo=None)
     return local
 
+def worksheet_setup(worksheet, columnsWidth, columnsFormat):
+    """
+    Set worksheet layout, rows height, columns width and default format
+    :param worksheet: xlsxwriter.worksheet.Worksheet
+    :param columnsWidth: List columns width
+    :param columnsFormat: List columns default format (xlsxwriter.format.Format)
+    """
+    cellHeight = 15
+    worksheet.set_portrait()
+    worksheet.set_default_row(cellHeight)
+    for col_num, (width, cell_format) in enumerate(zip(columnsWidth, columnsFormat)):
+        worksheet.set_column(col_num, col_num, width, cell_format)
+
+def worksheet_write_headers(worksheet, headers, headersFormat, rowsCount):
+    """
+    Write headers and set autofilter over the rows to come
+    :param worksheet: xlsxwriter.worksheet.Worksheet
+    :param headers: List headers
+    :param headersFormat: xlsxwriter.format.Format
+    :param rowsCount: Integer number of rows (headers excluded)
+    """
+    for col_num, data in enumerate(headers):
+        worksheet.write(0, col_num, data, headersFormat)
+    worksheet.autofilter(0, 0, rowsCount, 7)
+
+def worksheet_write_row(worksheet, row_num, row, columnsFormat):
+    """
+    Write a row
+    :param worksheet: xlsxwriter.worksheet.Worksheet
+    :param row_num: Integer row number
+    :param row: List row values
+    :param columnsFormat: List columns format (xlsxwriter.format.Format)
+    """
+    # Explicit format: URLs (e.g. card URL) keep the column format
+    for col_num, data in enumerate(row):
+        worksheet.write(row_num, col_num, data, columnsFormat[col_num])
+
+def render_docx(templateFileName, context, outputFileName):
+    """
+    Render a DOCX template and save it
+    :param templateFileName: String docx template
+    :param context: Dict template context
+    :param outputFileName: String
+    """
+    # Lower zlib compression level (default: 6) for faster saving
+    # python-docx doesn't expose it: set it on the ZipFile it uses (worker process only)
+    if not isinstance(docx_phys_pkg.ZipFile, functools.partial):
+        docx_phys_pkg.ZipFile = functools.partial(docx_phys_pkg.ZipFile, compresslevel=3)
+    document = DocxTemplate(templateFileName)
+    document.render(context)
+    document.save(outputFileName)
+
+def trello_rate_limit():
+    """
+    Wait for a free request slot (Trello: 100 requests per 10 seconds per token)
+    """
+    trelloRateLimit.acquire()
+    timer = threading.Timer(10, trelloRateLimit.release)
+    timer.daemon = True
+    timer.start()
+
+def download_attachment(url, fileName):
+    """
+    Download an attachment to fileName
+    :param url: String attachment url
+    :param fileName: String
+    :return: Boolean True if downloaded
+    """
+    trello_rate_limit()
+    try:
+        response = session.request("GET",url,proxies=proxies,headers=attachmentsHeaders,stream=True)
+        # Write the stuff (chunk by chunk)
+        with response, open(fileName, "wb") as f:
+            for chunk in response.iter_content(chunk_size=attachmentsChunkSize):
+                f.write(chunk)
+    except:
+        # Don't leave a partial file
+        if path_exists(fileName):
+            remove(fileName)
+        return False
+    return True
+
 def remove_if_exists(fileName):
     """
     Check if fileName exixts. Remove fileName if exists
@@ -124,456 +221,522 @@ def remove_if_exists(fileName):
 
 
 
-# Configure
-# ------------------------------
-# Read config
-config = get_config_from_ini()
-# Set proxies
-proxies = ''
-if str(config['Proxy']['use']) == 'True':
-    proxies = {
-       'http': config['Proxy']['http'],
-       'https': config['Proxy']['https'],
+if __name__ == '__main__':
+
+    # Configure
+    # ------------------------------
+    # Read config
+    config = get_config_from_ini()
+    # Set time zones
+    _FROM_ZONE = tz.gettz(config['Dates']['tz_from_zone'])
+    _TO_ZONE = tz.gettz(config['Dates']['tz_to_zone'])
+    # Set date formats
+    _DATE_FMT = config['Dates']['str_date_format']
+    _DATETIME_FMT = config['Dates']['str_datetime_format']
+    # Set proxies
+    proxies = ''
+    if str(config['Proxy']['use']) == 'True':
+        proxies = {
+           'http': config['Proxy']['http'],
+           'https': config['Proxy']['https'],
+        }
+    # Set headers
+    headers={
+        'Cache-Control': 'no-cache',
+        'Content-Type': 'application/json; charset=utf-8',
+        'Accept': 'application/json'
     }
-# Set headers
-headers={
-    'Cache-Control': 'no-cache',
-    'Content-Type': 'application/json; charset=utf-8',
-    'Accept': 'application/json'
-}
-attachmentsHeaders = {
-    "Authorization": f"OAuth oauth_consumer_key=\"{config['TrelloApi']['apiKey']}\", oauth_token=\"{config['TrelloApi']['apiToken']}\""
-}
-# Get base_url
-base_url = config['TrelloApi']['apiUrl']
-# Set paths
-# TODO : set path in config.ini
-path = './exports/'
-pathToCards = path + 'cards/'
-pathToArchived = path + 'archived/'
-pathToAttachments = path + 'attachments/'
-if not path_exists(path):
-    os.makedirs(path)
-if not path_exists(pathToCards):
-    os.makedirs(pathToCards)
-if not path_exists(pathToArchived):
-    os.makedirs(pathToArchived)
-if not path_exists(pathToAttachments):
-    os.makedirs(pathToAttachments)
-
-
-
-# Step 1 : Get boards
-# ------------------------------
-url = base_url + "members/me/boards"
-query = {
-   'key': config['TrelloApi']['apiKey'],
-   'token': config['TrelloApi']['apiToken'],
-   'fields': 'id,name,desc'
-}
-boards = []
-try:
-    response = requests.request("GET",url,proxies=proxies,params=query,headers=headers)
-except:
-    # TODO : add most common reason (Internet cnx, proxy...)
-    print("Oops, an error occurred.")
-    sys.exit()
-if response.status_code == 200:
-    json_data = json.loads(response.text)
-    # To be able to sort results by name, we create a List
-    for i in range(len(json_data)):
-        boards.append([
-            json_data[i]['id'],
-            json_data[i]['name'],
-            json_data[i]['desc'],
-        ])
-    boards = sorted(boards, key=lambda x: x[1])
-else:
-    print("Oops, an error occurred.")
-    print(f"Cannot retrieve boards that you are member of.")
-    print(f"Response code : {response.status_code}")
-    sys.exit()
-
-
-
-# Step 2 : Select a board
-# ------------------------------
-num = 0
-if len(boards) > 1:
-    print("------------------------------")
-    for i in range(len(boards)):
-        print( f'{i:4}: {boards[i][1]}')
-    print("------------------------------")
-    while True:
-        try:
-            num = int(input("Select a board : "))
-            if num < 0 or num >= len(boards):
-                raise ValueError()
-        except ValueError:
-            print("This is not a valid board number.")
-            continue
-        else:
-            break
-boardId   = boards[num][0]
-boardName = boards[num][1]
-boardDesc = boards[num][2]
-
-
-
-# Step 3 : Get lists
-# ------------------------------
-url = base_url + f"boards/{boardId}/lists"
-query = {
-   'key': config['TrelloApi']['apiKey'],
-   'token': config['TrelloApi']['apiToken'],
-   'fields': 'id,name,pos'
-}
-response = requests.request("GET",url,proxies=proxies,params=query,headers=headers)
-lists = []
-if response.status_code == 200:
-    json_data = json.loads(response.text)
-    # To be able to sort results (by pos), we create a List
-    for i in range(len(json_data)):
-        lists.append([
-            json_data[i]['id'],
-            json_data[i]['name'],
-            json_data[i]['pos'],
-        ])
-    lists = sorted(lists, key=lambda x: x[2])
-else:
-    print("Oops, an error occurred.")
-    print(f"Cannot retrieve Lists on '{boardName}'")
-    print(f"Response code : {response.status_code}")
-    sys.exit()
-
-
-
-# Step 4 : Export board to XLSX
-# ------------------------------
-print(f"Exporting board '{boardName}'...")
-
-url = base_url + f"boards/{boardId}/cards/all"
-query = {
-   'key': config['TrelloApi']['apiKey'],
-   'token': config['TrelloApi']['apiToken'],
-   'fields': 'id,name,desc,idList,labels,start,due,dueComplete,dateLastActivity,closed,idShort,shortUrl'
-}
-response = requests.request("GET",url,proxies=proxies,params=query,headers=headers)
-if response.status_code == 200:
-    cards = json.loads(response.text)
-else:
-    print("Oops, an error occurred.")
-    print(f"Cannot retrieve Board '{boardName}'")
-    print(f"Response code : {response.status_code}")
-    sys.exit()
-
-if len(cards) == 0:
-    print("No Card on this Board.")
-    sys.exit()
-
-# Set board filename
-boardFileName = sanitize_filename(boardName)
-boardFileName = boardFileName[:250] + ".xlsx"
-
-# Remove boardFileName if exists
-remove_if_exists(path + boardFileName)
-
-# Create workbook
-workbook = xlsxwriter.Workbook(path + boardFileName)
-worksheet1 = workbook.add_worksheet(config['Labels']['sheet_opened_cards'])
-worksheet2 = workbook.add_worksheet(config['Labels']['sheet_archived_cards'])
-
-# Worksheet setup
-cellHeight = 15
-worksheet1.set_portrait()
-worksheet1.set_default_row(cellHeight)
-worksheet1.set_column('A:A', 20)
-worksheet1.set_column('B:B', 45)
-worksheet1.set_column('C:C', 50)
-worksheet1.set_column('D:D', 16)
-worksheet1.set_column('E:E', 16)
-worksheet1.set_column('F:F', 16)
-worksheet1.set_column('G:G', 20)
-worksheet1.set_column('H:H', 10)
-worksheet1.set_column('I:I', 30)
-
-worksheet2.set_portrait()
-worksheet2.set_default_row(cellHeight)
-worksheet2.set_column('A:A', 20)
-worksheet2.set_column('B:B', 45)
-worksheet2.set_column('C:C', 50)
-worksheet2.set_column('D:D', 16)
-worksheet2.set_column('E:E', 16)
-worksheet2.set_column('F:F', 16)
-worksheet2.set_column('G:G', 20)
-worksheet2.set_column('H:H', 10)
-worksheet2.set_column('I:I', 30)
-
-# Cell Format
-cell_text_title = workbook.add_format()
-cell_text_title.set_align('left')
-cell_text_title.set_align('top')
-cell_text_title.set_bold()
-cell_text_title.set_text_wrap()
-
-cell_text_left = workbook.add_format()
-cell_text_left.set_align('left')
-cell_text_left.set_align('top')
-cell_text_left.set_text_wrap()
-
-cell_text_center = workbook.add_format()
-cell_text_center.set_align('center')
-cell_text_center.set_align('top')
-cell_text_center.set_text_wrap()
-
-# Set headers
-wsHeaders = [
-    config['Labels']['ws_header_list'],
-    config['Labels']['ws_header_title'],
-    config['Labels']['ws_header_description'],
-    config['Labels']['ws_header_start_date'],
-    config['Labels']['ws_header_due_date'],
-    config['Labels']['ws_header_last_activity_date'],
-    config['Labels']['ws_header_labels'],
-    config['Labels']['ws_header_num'],
-    config['Labels']['ws_header_url']
-    ]
-for row_num, data in enumerate(wsHeaders):
-    worksheet1.write(0, row_num, data, cell_text_title)
-    worksheet2.write(0, row_num, data, cell_text_title)
-
-worksheet1cellRow = 1
-worksheet2cellRow = 1
-for i in range(len(cards)):
-    listName = lists_get_name(cards[i]['idList'], lists)
-    cardStart = ''
-    if cards[i]['start'] is not None:
-        cardStart = convert_UTC_to_Local_Datetime(cards[i]['start']).strftime(config['Dates']['str_date_format'])
-    cardDue = ''
-    if cards[i]['due'] is not None:
-        cardDue = convert_UTC_to_Local_Datetime(cards[i]['due']).strftime(config['Dates']['str_datetime_format'])
-    cardLastActivity = ''
-    if cards[i]['dateLastActivity'] is not None:
-        cardLastActivity = convert_UTC_to_Local_Datetime(cards[i]['dateLastActivity']).strftime(config['Dates']['str_datetime_format'])
-    cardLabels = ''
-    if len(cards[i]['labels']) > 0:
-        arrLabels = []
-        for j in range(len(cards[i]['labels'])):
-            if cards[i]['labels'][j]['name'] != "":
-                arrLabels.append(cards[i]['labels'][j]['name'])
-        cardLabels = ", ".join(arrLabels)
-
-    if str(cards[i]['closed']) == 'False':
-        # Card is open
-        worksheet1.write(worksheet1cellRow, 0, listName, cell_text_left)
-        worksheet1.write(worksheet1cellRow, 1, cards[i]['name'], cell_text_left)
-        worksheet1.write(worksheet1cellRow, 2, cards[i]['desc'], cell_text_left)
-        worksheet1.write(worksheet1cellRow, 3, cardStart, cell_text_center)
-        worksheet1.write(worksheet1cellRow, 4, cardDue, cell_text_center)
-        worksheet1.write(worksheet1cellRow, 5, cardLastActivity, cell_text_center)
-        worksheet1.write(worksheet1cellRow, 6, cardLabels, cell_text_left)
-        worksheet1.write(worksheet1cellRow, 7, cards[i]['idShort'], cell_text_center)
-        worksheet1.write(worksheet1cellRow, 8, cards[i]['shortUrl'], cell_text_left)
-        worksheet1cellRow += 1
+    attachmentsHeaders = {
+        "Authorization": f"OAuth oauth_consumer_key=\"{config['TrelloApi']['apiKey']}\", oauth_token=\"{config['TrelloApi']['apiToken']}\""
+    }
+    # Get base_url
+    base_url = config['TrelloApi']['apiUrl']
+    # HTTP session (reuses connections)
+    session = requests.Session()
+    # Concurrent requests
+    maxWorkers = 8
+    trelloRateLimit = threading.BoundedSemaphore(100)
+    # Max number of actions per request (Trello API limit)
+    actionsLimit = 1000
+    # Attachments download chunk size (bytes)
+    attachmentsChunkSize = 65536
+    # Set paths
+    # TODO : set path in config.ini
+    path = './exports/'
+    pathToCards = path + 'cards/'
+    pathToArchived = path + 'archived/'
+    pathToAttachments = path + 'attachments/'
+    if not path_exists(path):
+        os.makedirs(path)
+    if not path_exists(pathToCards):
+        os.makedirs(pathToCards)
+    if not path_exists(pathToArchived):
+        os.makedirs(pathToArchived)
+    if not path_exists(pathToAttachments):
+        os.makedirs(pathToAttachments)
+
+
+
+    # Step 1 : Get boards
+    # ------------------------------
+    url = base_url + "members/me/boards"
+    query = {
+       'key': config['TrelloApi']['apiKey'],
+       'token': config['TrelloApi']['apiToken'],
+       'fields': 'id,name,desc'
+    }
+    boards = []
+    try:
+        response = session.request("GET",url,proxies=proxies,params=query,headers=headers)
+    except:
+        # TODO : add most common reason (Internet cnx, proxy...)
+        print("Oops, an error occurred.")
+        sys.exit()
+    if response.status_code == 200:
+        json_data = json_loads(response.content)
+        # To be able to sort results by name, we create a List
+        for board in json_data:
+            boards.append([
+                board['id'],
+                board['name'],
+                board['desc'],
+            ])
+        boards = sorted(boards, key=lambda x: x[1])
     else:
-        # Card was archived
-        worksheet2.write(worksheet2cellRow, 0, listName, cell_text_left)
-        worksheet2.write(worksheet2cellRow, 1, cards[i]['name'], cell_text_left)
-        worksheet2.write(worksheet2cellRow, 2, cards[i]['desc'], cell_text_left)
-        worksheet2.write(worksheet2cellRow, 3, cardStart, cell_text_center)
-        worksheet2.write(worksheet2cellRow, 4, cardDue, cell_text_center)
-        worksheet2.write(worksheet2cellRow, 5, cardLastActivity, cell_text_center)
-        worksheet2.write(worksheet2cellRow, 6, cardLabels, cell_text_left)
-        worksheet2.write(worksheet2cellRow, 7, cards[i]['idShort'], cell_text_center)
-        worksheet2.write(worksheet2cellRow, 8, cards[i]['shortUrl'], cell_text_left)
-        worksheet2cellRow += 1
-
-worksheet1.autofilter(0, 0, worksheet1cellRow-1, 7)
-worksheet2.autofilter(0, 0, worksheet2cellRow-1, 7)
-workbook.close()
-
-
-
-# Step 4 : Export cards to DOCX
-# ------------------------------
-print("Exporting cards...")
-
-# For each card
-for i in range(len(cards)):
-    url = base_url + f"cards/{cards[i]['id']}"
+        print("Oops, an error occurred.")
+        print(f"Cannot retrieve boards that you are member of.")
+        print(f"Response code : {response.status_code}")
+        sys.exit()
+
+
+
+    # Step 2 : Select a board
+    # ------------------------------
+    num = 0
+    if len(boards) > 1:
+        print("------------------------------")
+        for i, board in enumerate(boards):
+            print( f'{i:4}: {board[1]}')
+        print("------------------------------")
+        while True:
+            try:
+                num = int(input("Select a board : "))
+                if num < 0 or num >= len(boards):
+                    raise ValueError()
+            except ValueError:
+                print("This is not a valid board number.")
+                continue
+            else:
+                break
+    boardId   = boards[num][0]
+    boardName = boards[num][1]
+    boardDesc = boards[num][2]
+
+
+
+    # Step 3 : Get lists
+    # ------------------------------
+    url = base_url + f"boards/{boardId}/lists"
     query = {
        'key': config['TrelloApi']['apiKey'],
        'token': config['TrelloApi']['apiToken'],
-       'fields': 'id,closed,dueComplete,dateLastActivity,desc,due,idList,idShort,labels,name,start',
+       'fields': 'id,name,pos'
+    }
+    response = session.request("GET",url,proxies=proxies,params=query,headers=headers)
+    lists = []
+    if response.status_code == 200:
+        json_data = json_loads(response.content)
+        # To be able to sort results (by pos), we create a List
+        for trelloList in json_data:
+            lists.append([
+                trelloList['id'],
+                trelloList['name'],
+                trelloList['pos'],
+            ])
+        lists = sorted(lists, key=lambda x: x[2])
+        # Lists names by id
+        listNamesById = {row[0]: row[1] for row in lists}
+    else:
+        print("Oops, an error occurred.")
+        print(f"Cannot retrieve Lists on '{boardName}'")
+        print(f"Response code : {response.status_code}")
+        sys.exit()
+
+
+
+    # Step 4 : Export board to XLSX
+    # ------------------------------
+    print(f"Exporting board '{boardName}'...")
+
+    url = base_url + f"boards/{boardId}"
+    query = {
+       'key': config['TrelloApi']['apiKey'],
+       'token': config['TrelloApi']['apiToken'],
+       'fields': 'id',
+       'cards': 'all',
+       'card_fields': 'id,name,desc,idList,labels,start,due,dateLastActivity,closed,idShort,shortUrl',
+       'card_attachments': 'true',
+       'card_attachment_fields': 'date,name,url',
+       'checklists': 'all',
+       'checklist_fields': 'idCard,name,pos',
        'actions': 'commentCard,updateCheckItemStateOnCard',
-       'attachments': 'true',
-       'checklists': 'all'
+       'actions_limit': actionsLimit,
+       'action_fields': 'data,date,type',
+       'action_memberCreator_fields': config['Labels']['user_name']
     }
-    response = requests.request("GET",url,proxies=proxies,params=query,headers=headers)
+    response = session.request("GET",url,proxies=proxies,params=query,headers=headers)
     if response.status_code == 200:
-        card = json.loads(response.text)
+        json_data = json_loads(response.content)
+        cards = json_data['cards']
+        boardChecklists = json_data['checklists']
+        boardActions = json_data['actions']
     else:
         print("Oops, an error occurred.")
+        print(f"Cannot retrieve Board '{boardName}'")
+        print(f"Response code : {response.status_code}")
         sys.exit()
 
-    print(f"[{i+1}/{len(cards)}] Card #{card['idShort']} '{card['name']}'")
-
-    # Labels
-    cardLabels = ''
-    if len(card['labels']) > 0:
-        arrLabels = []
-        for i in range(len(card['labels'])):
-            if card['labels'][i]['name'] != "":
-                arrLabels.append( escape_xml(card['labels'][i]['name']) )
-        cardLabels = ", ".join(arrLabels)
-    
-    # Dates
-    cardStart = ''
-    if card['start'] is not None:
-        cardStart = convert_UTC_to_Local_Datetime(card['start']).strftime(config['Dates']['str_date_format'])
-    cardDue = ''
-    if card['due'] is not None:
-        cardDue = convert_UTC_to_Local_Datetime(card['due']).strftime(config['Dates']['str_datetime_format'])
-    cardLastActivity = ''
-    if card['dateLastActivity'] is not None:
-        cardLastActivity = convert_UTC_to_Local_Datetime(card['dateLastActivity']).strftime(config['Dates']['str_datetime_format'])
-    
-    # Checklists
-    checklists = []
-    if 'checklists' in card:
-        if len(card['checklists']) > 0:
-            checklists = []
-            # get checklists
-            for i in range(len(card['checklists'])):
-                if card['checklists'][i]['name'] != "":
-                    checkItems = []
-                    pcentComplet = ''
-                    # get checkItems
-                    if card['checklists'][i]['checkItems']:
-                        if len(card['checklists'][i]['checkItems']) > 0:
-                            checklistComplete = 0
-                            for j in range(len(card['checklists'][i]['checkItems'])):
-                                # Get last 'updateCheckItemStateOnCard' date
-                                updateCheckItemStateDate = ''
-                                if 'actions' in card:
-                                    if len(card['actions']) > 0:
-                                        for k in range(len(card['actions'])):
-                                            if card['actions'][k]['type'] == 'updateCheckItemStateOnCard':
-                                                if card['actions'][k]['data']['checkItem']['id'] == card['checklists'][i]['checkItems'][j]['id']:
-                                                    updateCheckItemStateDate = convert_UTC_to_Local_Datetime(card['actions'][k]['date']).strftime(config['Dates']['str_date_format'])
-                                                    break
-                                # checkItem status
-                                if card['checklists'][i]['checkItems'][j]['state'] == 'complete':
-                                    checklistComplete += 1
-                                # push checkItem
-                                checkItems.append([
-                                    escape_xml(card['checklists'][i]['checkItems'][j]['name']),
-                                    card['checklists'][i]['checkItems'][j]['pos'],
-                                    card['checklists'][i]['checkItems'][j]['state'],
-                                    updateCheckItemStateDate
-                                ])
-                            # order checkItems by position (pos)
-                            if len(checkItems) > 0:
-                                checkItems =  sorted(checkItems, key=lambda x: x[1])    
-                            # pcent complete
-                            pcentComplet =  str(int(round((checklistComplete / len(card['checklists'][i]['checkItems'])) * 100, 0))) + '%'
-                    # push checklist
-                    checklists.append([
-                        escape_xml(card['checklists'][i]['name']),
-                        card['checklists'][i]['pos'],
-                        checkItems,
-                        pcentComplet
-                    ])
+    # Actions : Trello returns at most 'actionsLimit' actions, scroll back to get older ones
+    actionsPage = boardActions
+    while len(actionsPage) == actionsLimit:
+        url = base_url + f"boards/{boardId}/actions"
+        query = {
+           'key': config['TrelloApi']['apiKey'],
+           'token': config['TrelloApi']['apiToken'],
+           'filter': 'commentCard,updateCheckItemStateOnCard',
+           'fields': 'data,date,type',
+           'memberCreator_fields': config['Labels']['user_name'],
+           'limit': actionsLimit,
+           'before': actionsPage[-1]['id']
+        }
+        response = session.request("GET",url,proxies=proxies,params=query,headers=headers)
+        if response.status_code == 200:
+            actionsPage = json_loads(response.content)
+            boardActions.extend(actionsPage)
+        else:
+            print("Oops, an error occurred.")
+            print(f"Cannot retrieve Actions on '{boardName}'")
+            print(f"Response code : {response.status_code}")
+            sys.exit()
+
+    # Attach checklists and actions (newest first) to their card
+    checklistsByCard = {}
+    for checklist in boardChecklists:
+        checklistsByCard.setdefault(checklist['idCard'], []).append(checklist)
+    actionsByCard = {}
+    for action in boardActions:
+        actionsByCard.setdefault(action['data']['card']['id'], []).append(action)
+    for card in cards:
+        card['checklists'] = checklistsByCard.get(card['id'], [])
+        card['actions'] = actionsByCard.get(card['id'], [])
+
+    if len(cards) == 0:
+        print("No Card on this Board.")
+        sys.exit()
+
+    # Set board filename
+    boardFileName = sanitize_filename(boardName)
+    boardFileName = boardFileName[:250] + ".xlsx"
+
+    # Remove boardFileName if exists
+    remove_if_exists(path + boardFileName)
+
+    # Set headers
+    wsHeaders = [
+        config['Labels']['ws_header_list'],
+        config['Labels']['ws_header_title'],
+        config['Labels']['ws_header_description'],
+        config['Labels']['ws_header_start_date'],
+        config['Labels']['ws_header_due_date'],
+        config['Labels']['ws_header_last_activity_date'],
+        config['Labels']['ws_header_labels'],
+        config['Labels']['ws_header_num'],
+        config['Labels']['ws_header_url']
+        ]
+    wsColumnsWidth = [20, 45, 50, 16, 16, 16, 20, 10, 30]
+    wsColumnsAlign = ['left', 'left', 'left', 'center', 'center', 'center', 'left', 'center', 'left']
+
+    # Count open / archived cards (autofilter range is set before writing rows)
+    openedCardsCount = 0
+    archivedCardsCount = 0
+    for card in cards:
+        if not card['closed']:
+            openedCardsCount += 1
+        else:
+            archivedCardsCount += 1
+
+    # Create workbook
+    # constant_memory: rows are flushed to disk as they are written
+    workbook = xlsxwriter.Workbook(path + boardFileName, {'constant_memory': True})
+
+    # Cell Format
+    cell_text_title = workbook.add_format()
+    cell_text_title.set_align('left')
+    cell_text_title.set_align('top')
+    cell_text_title.set_bold()
+    cell_text_title.set_text_wrap()
+
+    cell_text_left = workbook.add_format()
+    cell_text_left.set_align('left')
+    cell_text_left.set_align('top')
+    cell_text_left.set_text_wrap()
+
+    cell_text_center = workbook.add_format()
+    cell_text_center.set_align('center')
+    cell_text_center.set_align('top')
+    cell_text_center.set_text_wrap()
+
+    cellFormatByAlign = {'left': cell_text_left, 'center': cell_text_center}
+    wsColumnsFormat = [cellFormatByAlign[align] for align in wsColumnsAlign]
+
+    # Create worksheets (skip empty ones)
+    if openedCardsCount > 0:
+        worksheet1 = workbook.add_worksheet(config['Labels']['sheet_opened_cards'])
+        worksheet_setup(worksheet1, wsColumnsWidth, wsColumnsFormat)
+        worksheet_write_headers(worksheet1, wsHeaders, cell_text_title, openedCardsCount)
+    if archivedCardsCount > 0:
+        worksheet2 = workbook.add_worksheet(config['Labels']['sheet_archived_cards'])
+        worksheet_setup(worksheet2, wsColumnsWidth, wsColumnsFormat)
+        worksheet_write_headers(worksheet2, wsHeaders, cell_text_title, archivedCardsCount)
+
+    worksheet1cellRow = 1
+    worksheet2cellRow = 1
+    for card in cards:
+        listName = listNamesById.get(card['idList'], '')
+        cardStart = ''
+        if card['start'] is not None:
+            cardStart = convert_UTC_to_Local_Datetime(card['start']).strftime(_DATE_FMT)
+        cardDue = ''
+        if card['due'] is not None:
+            cardDue = convert_UTC_to_Local_Datetime(card['due']).strftime(_DATETIME_FMT)
+        cardLastActivity = ''
+        if card['dateLastActivity'] is not None:
+            cardLastActivity = convert_UTC_to_Local_Datetime(card['dateLastActivity']).strftime(_DATETIME_FMT)
+        cardLabels = ''
+        if len(card['labels']) > 0:
+            arrLabels = []
+            for label in card['labels']:
+                if label['name'] != "":
+                    arrLabels.append(label['name'])
+            cardLabels = ", ".join(arrLabels)
+
+        row = [
+            listName,
+            card['name'],
+            card['desc'],
+            cardStart,
+            cardDue,
+            cardLastActivity,
+            cardLabels,
+            card['idShort'],
+            card['shortUrl']
+        ]
+        if not card['closed']:
+            # Card is open
+            worksheet_write_row(worksheet1, worksheet1cellRow, row, wsColumnsFormat)
+            worksheet1cellRow += 1
+        else:
+            # Card was archived
+            worksheet_write_row(worksheet2, worksheet2cellRow, row, wsColumnsFormat)
+            worksheet2cellRow += 1
+
+    workbook.close()
+
+
+
+    # Step 4 : Export cards to DOCX
+    # ------------------------------
+    print("Exporting cards...")
+
+    # Download attachments (concurrent requests)
+    attachmentsExecutor = ThreadPoolExecutor(max_workers=maxWorkers)
+    # Render DOCX documents (worker processes)
+    # 'spawn': forking this process is unsafe, attachments threads are already running
+    docxExecutor = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context('spawn'))
+    docxFuturesByPath = {}
+
+    # For each card
+    for cardNum, card in enumerate(cards, 1):
+        print(f"[{cardNum}/{len(cards)}] Card #{card['idShort']} '{card['name']}'")
+
+        # Labels
+        cardLabels = ''
+        if len(card['labels']) > 0:
+            arrLabels = []
+            for label in card['labels']:
+                if label['name'] != "":
+                    arrLabels.append( escape_xml(label['name']) )
+            cardLabels = ", ".join(arrLabels)
+
+        # Dates
+        cardStart = ''
+        if card['start'] is not None:
+            cardStart = convert_UTC_to_Local_Datetime(card['start']).strftime(_DATE_FMT)
+        cardDue = ''
+        if card['due'] is not None:
+            cardDue = convert_UTC_to_Local_Datetime(card['due']).strftime(_DATETIME_FMT)
+        cardLastActivity = ''
+        if card['dateLastActivity'] is not None:
+            cardLastActivity = convert_UTC_to_Local_Datetime(card['dateLastActivity']).strftime(_DATETIME_FMT)
+
+        # Last 'updateCheckItemStateOnCard' date by checkItem id (actions are newest first)
+        lastUpdateByCheckItem = {}
+        if 'actions' in card:
+            for action in card['actions']:
+                if action['type'] == 'updateCheckItemStateOnCard':
+                    lastUpdateByCheckItem.setdefault(action['data']['checkItem']['id'], action['date'])
+
+        # Checklists
+        checklists = []
+        if 'checklists' in card:
+            if len(card['checklists']) > 0:
+                checklists = []
+                # get checklists
+                for checklist in card['checklists']:
+                    if checklist['name'] != "":
+                        checkItems = []
+                        pcentComplet = ''
+                        # get checkItems
+                        if checklist['checkItems']:
+                            if len(checklist['checkItems']) > 0:
+                                checklistComplete = 0
+                                for checkItem in checklist['checkItems']:
+                                    # Get last 'updateCheckItemStateOnCard' date
+                                    updateCheckItemStateDate = ''
+                                    if checkItem['id'] in lastUpdateByCheckItem:
+                                        updateCheckItemStateDate = convert_UTC_to_Local_Datetime(lastUpdateByCheckItem[checkItem['id']]).strftime(_DATE_FMT)
+                                    # checkItem status
+                                    if checkItem['state'] == 'complete':
+                                        checklistComplete += 1
+                                    # push checkItem
+                                    checkItems.append([
+                                        escape_xml(checkItem['name']),
+                                        checkItem['pos'],
+                                        checkItem['state'],
+                                        updateCheckItemStateDate
+                                    ])
+                                # order checkItems by position (pos)
+                                if len(checkItems) > 0:
+                                    checkItems =  sorted(checkItems, key=lambda x: x[1])    
+                                # pcent complete
+                                pcentComplet =  str(int(round((checklistComplete / len(checklist['checkItems'])) * 100, 0))) + '%'
+                        # push checklist
+                        checklists.append([
+                            escape_xml(checklist['name']),
+                            checklist['pos'],
+                            checkItems,
+                            pcentComplet
+                        ])
                 # order checklists by position (pos)
                 if len(checklists) > 0:
                     checklists = sorted(checklists, key=lambda x: x[1])
 
-    # Actions
-    actions = []
-    if 'actions' in card:
-        if len(card['actions']) > 0:
-            for i in range(len(card['actions'])):
-                if card['actions'][i]["type"] == "commentCard":
-                    actions.append([
-                        convert_UTC_to_Local_Datetime(card['actions'][i]['date']).strftime(config['Dates']['str_datetime_format']),
-                        escape_xml(card['actions'][i]['memberCreator'][config['Labels']['user_name']]),
-                        escape_xml(card['actions'][i]["data"]["text"])
+        # Actions
+        actions = []
+        if 'actions' in card:
+            if len(card['actions']) > 0:
+                for action in card['actions']:
+                    if action["type"] == "commentCard":
+                        actions.append([
+                            convert_UTC_to_Local_Datetime(action['date']).strftime(_DATETIME_FMT),
+                            escape_xml(action['memberCreator'][config['Labels']['user_name']]),
+                            escape_xml(action["data"]["text"])
+                        ])
+
+        # Attachments
+        attachments = []
+        if 'attachments' in card:
+            if len(card['attachments']) > 0:
+                attachmentsFileNames = []
+                for attachment in card['attachments']:
+                    attachmentFileName = sanitize_filename( str(card['idShort']) + "-" + str(attachment['name']) )
+                    remove_if_exists(pathToAttachments + attachmentFileName)
+                    attachmentsFileNames.append(attachmentFileName)
+                # Same file name: only the last attachment is downloaded (it would overwrite the others)
+                attachmentsUrlByFileName = {}
+                for attachment, attachmentFileName in zip(card['attachments'], attachmentsFileNames):
+                    attachmentsUrlByFileName[attachmentFileName] = attachment['url']
+                # Download attachments (concurrent requests)
+                for attachmentFileName in attachmentsUrlByFileName:
+                    print(f"  Downloading '{attachmentFileName}'")
+                downloaded = dict(zip(
+                    attachmentsUrlByFileName,
+                    attachmentsExecutor.map(
+                        download_attachment,
+                        attachmentsUrlByFileName.values(),
+                        [pathToAttachments + attachmentFileName for attachmentFileName in attachmentsUrlByFileName]
+                    )
+                ))
+                for attachmentFileName, isDownloaded in downloaded.items():
+                    if not isDownloaded:
+                        print("  Oops, an error occurred.")
+                        print(f"  Cannot download '{attachmentFileName}'")
+                for attachment, attachmentFileName in zip(card['attachments'], attachmentsFileNames):
+                    if not downloaded[attachmentFileName]:
+                        continue
+                    # push attachment
+                    attachments.append([
+                        attachmentFileName,
+                        convert_UTC_to_Local_Datetime(attachment['date']).strftime(_DATE_FMT)
                     ])
 
-    # Attachments
-    attachments = []
-    if 'attachments' in card:
-        if len(card['attachments']) > 0:
-            for i in range(len(card['attachments'])):
-                # Download attachment
-                attachmentFileName = sanitize_filename( str(card['idShort']) + "-" + str(card['attachments'][i]['name']) )
-                remove_if_exists(pathToAttachments + attachmentFileName)
-                url = card['attachments'][i]['url']
-                print(f"  Downloading '{attachmentFileName}'")
-                try:
-                    response = requests.request("GET",url,proxies=proxies,headers=attachmentsHeaders)
-                except:
-                    print("  Oops, an error occurred.")
-                    print(f"  Cannot download '{attachmentFileName}'")
-                    print(f"  Response code : {response.status_code}")
-                    continue
-                bytesio_object = BytesIO(response.content)
-                # Write the stuff
-                with open(pathToAttachments + attachmentFileName, "wb") as f:
-                    f.write(bytesio_object.getbuffer())
-                # push attachment
-                attachments.append([
-                    attachmentFileName,
-                    convert_UTC_to_Local_Datetime(card['attachments'][i]['date']).strftime(config['Dates']['str_date_format'])
-                ])
-
-    # Template context             
-    context = {}
-    context["title"] = escape_xml(card['name'])
-    context["list"] = escape_xml(lists_get_name(card['idList'], lists))
-    context["labels"] = escape_xml(cardLabels)
-    context["startDate"] = cardStart
-    context["dueDate"] = cardDue
-    context["lastActivityDate"] = cardLastActivity
-    context["description"] = escape_xml(card['desc'])
-    context["checklists"] = checklists
-    context["actions"] = actions
-    context["attachments"] = attachments
-
-
-    # Export
-    outputFileName = sanitize_filename(card['name'])
-    if config['Template']['template'][-5:] == ".docx":
-        # Render
-        document = DocxTemplate('./templates/' + config['Template']['template'])
-        document.render(context)
-        outputFileName = outputFileName[:250] + ".docx"
-
-        # Save
-        if str(card['closed']) == 'False':
-            remove_if_exists(pathToCards + outputFileName)
-            document.save(pathToCards + outputFileName)
-        else:
-            remove_if_exists(pathToArchived + outputFileName)
-            document.save(pathToArchived + outputFileName)
-
-
-    if config['Template']['template'][-5:] == ".html":
-        # Render
-        template_loader = jinja2.FileSystemLoader(searchpath="./templates")
-        template_env = jinja2.Environment(loader=template_loader)
-        template_file = config['Template']['template']
-        template = template_env.get_template(template_file)
-        # markdown -> html
-        context["description"] = markdown.markdown(context["description"])
-        for i in range(len(context['actions'])):
-            context['actions'][i][2] = markdown.markdown(context['actions'][i][2])
-        output_text = template.render(context)
-
-        # Export to PDF
-        outputFileName = outputFileName[:250] + ".pdf"
-        result_file = open(f'{pathToCards}{outputFileName}', "w+b")
-        pisa_status = pisa.CreatePDF(output_text, dest=result_file)
-        result_file.close()
-
-print("Done.")
+        # Template context             
+        context = {}
+        context["title"] = escape_xml(card['name'])
+        context["list"] = escape_xml(listNamesById.get(card['idList'], ''))
+        context["labels"] = escape_xml(cardLabels)
+        context["startDate"] = cardStart
+        context["dueDate"] = cardDue
+        context["lastActivityDate"] = cardLastActivity
+        context["description"] = escape_xml(card['desc'])
+        context["checklists"] = checklists
+        context["actions"] = actions
+        context["attachments"] = attachments
+
+
+        # Export
+        outputFileName = sanitize_filename(card['name'])
+        if config['Template']['template'][-5:] == ".docx":
+            outputFileName = outputFileName[:250] + ".docx"
+            if not card['closed']:
+                outputFilePath = pathToCards + outputFileName
+            else:
+                outputFilePath = pathToArchived + outputFileName
+            # Same file name as a previous card: wait for it, then overwrite it
+            if outputFilePath in docxFuturesByPath:
+                docxFuturesByPath[outputFilePath].result()
+            remove_if_exists(outputFilePath)
+
+            # Render and save (worker process)
+            docxFuturesByPath[outputFilePath] = docxExecutor.submit(
+                render_docx,
+                './templates/' + config['Template']['template'],
+                context,
+                outputFilePath
+            )
+
+
+        if config['Template']['template'][-5:] == ".html":
+            # Render
+            template_loader = jinja2.FileSystemLoader(searchpath="./templates")
+            template_env = jinja2.Environment(loader=template_loader)
+            template_file = config['Template']['template']
+            template = template_env.get_template(template_file)
+            # markdown -> html
+            context["description"] = markdown.markdown(context["description"])
+            for action in context['actions']:
+                action[2] = markdown.markdown(action[2])
+            output_text = template.render(context)
+
+            # Export to PDF
+            outputFileName = outputFileName[:250] + ".pdf"
+            result_file = open(f'{pathToCards}{outputFileName}', "w+b")
+            pisa_status = pisa.CreatePDF(output_text, dest=result_file)
+            result_file.close()
+
+    attachmentsExecutor.shutdown()
+    # Wait for DOCX documents (raise worker errors, if any)
+    for future in docxFuturesByPath.values():
+        future.result()
+    docxExecutor.shutdown()
+    print("Done.")